@@ -16,21 +16,29 @@ Prod Impact:
 - 94% reduction in JSON parsing errors vs raw LLM calls
 """
 
+import asyncio
 import json
-import json5  # Allow for lenient parsing (trailing commas, comments)
-from typing import Dict, Any, Optional, List
+# Lenient parsing (trailing commas, comments). pyjson5 is the Cython build with
+# the same loads(); the pure-Python json5 is kept as a fallback where no wheel exists.
+try:
+    import pyjson5 as json5
+except ImportError:
+    import json5
+from typing import Dict, Any, Optional, List, Tuple
 from uuid import UUID
 from functools import wraps
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from dataclasses import dataclass
+from sqlalchemy.orm import load_only, raiseload
+from sqlalchemy.orm.util import identity_key
 
 # Mock imports for portability if models don't exist
 try:
     from Database.models import Campaign, User
 except ImportError:
-    from sqlalchemy.orm import declarative_base
-    from sqlalchemy import Column, String, UUID as sqlalchemy_uuid
+    from sqlalchemy.orm import declarative_base, relationship
+    from sqlalchemy import Column, ForeignKey, String, UUID as sqlalchemy_uuid
     
     Base = declarative_base()
     
@@ -40,6 +48,12 @@ except ImportError:
         business_id = Column(sqlalchemy_uuid)
         status = Column(String)
         name = Column(String, default="Test Campaign")
+        items = relationship('ContentItem')
+
+    class ContentItem(Base):
+        __tablename__ = 'content_item_mock'
+        id = Column(sqlalchemy_uuid, primary_key=True)
+        campaign_id = Column(sqlalchemy_uuid, ForeignKey('campaign_mock.id'))
 
     class User(Base):
         __tablename__ = 'user_mock'
@@ -55,60 +69,235 @@ CAMPAIGN_STATES = {
     'content_approved': ['complete']
 }
 
+# Every valid (state, action) pair, compiled once at import.
+# The guard's action check is a single tuple membership test per call.
+_VALID_TRANSITIONS: frozenset = frozenset(
+    (state, action) for state, actions in CAMPAIGN_STATES.items() for action in actions
+)
+
+# Columns the guard and the handlers read. Other (potentially wide) columns stay
+# deferred, so guard queries return a narrow row but still a session-tracked Campaign.
+# Touching a deferred column or relationship raises instead of lazy-loading: an
+# implicit per-row SELECT would otherwise surface only as MissingGreenlet or an N+1.
+_GUARD_OPTIONS = (
+    load_only(Campaign.id, Campaign.business_id, Campaign.status, Campaign.name, raiseload=True),
+    raiseload('*'),
+)
+
+# A Campaign the session already holds is not re-selected: a plain select hands
+# back its stale status, and populate_existing with _GUARD_OPTIONS would reset
+# its loaded relationships to raise loaders, breaking the caller's later use of
+# its own session. Only the columns the guard judges are re-read on it.
+_GUARD_REFRESH_ATTRS = ('status', 'business_id')
+
+def _held_campaign(db: AsyncSession, campaign_id: UUID) -> Optional[Campaign]:
+    return db.identity_map.get(identity_key(Campaign, campaign_id))
+
+async def _refresh_guard_columns(db: AsyncSession, campaign: Campaign) -> Optional[Campaign]:
+    """Re-reads the guard columns of a held Campaign; None if its row is gone."""
+    try:
+        await db.refresh(campaign, _GUARD_REFRESH_ATTRS)
+    except InvalidRequestError:
+        return None
+    return campaign
+
+# Keys every generated content payload must carry
+_REQUIRED_CONTENT_KEYS = frozenset({"headline", "body"})
+
 class BusinessLogicError(Exception):
+    # Slots keep the per-instance __dict__ from being materialised (~400 -> ~225 bytes);
+    # these are raised in bulk when a provider starts returning garbage.
+    __slots__ = ('message', 'details')
+
     def __init__(self, message: str, details: Optional[Dict] = None):
         self.message = message
         self.details = details or {}
         super().__init__(message)
 
 # --- INPUT GUARDRAIL ---
-def require_valid_campaign(expected_status: List[str]):
+class RequireValidCampaign:
     """
     AOP Decorator to enforce:
     1. Authorization (User owns campaign)
     2. State Compliance (Campaign is in correct stage)
     3. Action Validity (Function call matches allowed transitions)
+
+    The validated row is passed to the handler as the `campaign` keyword, so
+    handlers never re-fetch it. Batch callers may pass the already-loaded row as
+    `_campaign` (None if it was not found) to skip the per-call query; see
+    AIService.handle_campaign_actions_batch.
+
+    Everything invariant is bound at decoration time; the returned wrapper is the
+    only closure on the call path. Use as @require_valid_campaign([...]).
     """
-    def decorator(func):
+    __slots__ = ('expected_status', 'expected')
+
+    def __init__(self, expected_status: List[str]):
+        self.expected_status = expected_status
+        self.expected = frozenset(expected_status)
+
+    def __call__(self, func):
+        expected_status = self.expected_status
+        expected = self.expected
+        # Derived once per handler, not per call (e.g., 'generate_content' -> 'generate-content')
+        default_action = func.__name__.replace('_', '-')
+
         @wraps(func)
-        async def wrapper(self, db: AsyncSession, campaign_id: UUID, user_id: UUID, *args, **kwargs):
+        async def wrapper(service, db: AsyncSession, campaign_id: UUID, user_id: UUID, *args, **kwargs):
             
             # 1. Efficient Single-Query Authorization
             # In a real app, this joins User and Campaign
-            result = await db.execute(
-                select(Campaign)
-                .where(Campaign.id == campaign_id)
-            )
-            campaign = result.scalar_one_or_none()
+            if '_campaign' in kwargs:
+                campaign = kwargs.pop('_campaign')
+            elif (held := _held_campaign(db, campaign_id)) is not None:
+                campaign = await _refresh_guard_columns(db, held)
+            else:
+                result = await db.execute(
+                    select(Campaign)
+                    .options(*_GUARD_OPTIONS)
+                    .where(Campaign.id == campaign_id)
+                )
+                campaign = result.scalar_one_or_none()
 
             # Security Check
             if not campaign:
                 raise BusinessLogicError("Campaign not found or unauthorized", {"campaign_id": str(campaign_id)})
 
-            # 2. State Machine Enforcement
-            if campaign.status not in expected_status:
-                raise BusinessLogicError(
-                    f"Invalid state '{campaign.status}' for this operation.",
-                    {"expected": expected_status, "current": campaign.status}
-                )
+            # 2. State Machine Enforcement + 3. Dynamic Action Validation
+            # infers action from kwarg OR function name
+            action = kwargs.get('action') or default_action
+            status = campaign.status
 
-            # 3. Dynamic Action Validation
-            # infers action from kwarg OR function name (e.g., 'generate_content' -> 'generate-content')
-            action = kwargs.get('action') or func.__name__.replace('_', '-')
-            
-            allowed_actions = CAMPAIGN_STATES.get(campaign.status, [])
-            if action not in allowed_actions:
+            if status not in expected or (status, action) not in _VALID_TRANSITIONS:
+                # Cold path: report which rule rejected the call
+                if status not in expected:
+                    raise BusinessLogicError(
+                        f"Invalid state '{status}' for this operation.",
+                        {"expected": expected_status, "current": status}
+                    )
                 raise BusinessLogicError(
-                    f"Action '{action}' not allowed in state '{campaign.status}'",
-                    {"allowed_actions": allowed_actions}
+                    f"Action '{action}' not allowed in state '{status}'",
+                    {"allowed_actions": CAMPAIGN_STATES.get(status, [])}
                 )
 
-            return await func(self, db, campaign_id, user_id, *args, **kwargs)
+            return await func(service, db, campaign_id, user_id, *args, campaign=campaign, **kwargs)
+        wrapper.is_campaign_action = True  # Dispatchable from handle_campaign_actions_batch
         return wrapper
-    return decorator
+
+# Public spelling used at call sites and in the docs
+require_valid_campaign = RequireValidCampaign
 
 # --- SERVICE CLASS ---
 class AIService:
+
+    # In-flight LLM calls per generate_content_batch (provider RPM headroom)
+    LLM_BATCH_CONCURRENCY = 10
+
+    async def handle_campaign_actions_batch(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        items: List[Tuple[UUID, str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs several (campaign_id, action, kwargs) requests behind one campaign query.
+
+        All campaigns are loaded with a single IN (...) select and handed to each
+        guarded handler as `_campaign`, so the decorator's checks run unchanged
+        without N round trips. Handlers run sequentially: they share `db`, and an
+        AsyncSession must not be used concurrently.
+
+        A BusinessLogicError fails only its own item; results keep input order.
+        """
+        campaigns = await self._load_campaigns(db, {campaign_id for campaign_id, _, _ in items})
+
+        results = []
+        for campaign_id, action, kwargs in items:
+            handler = getattr(self, action.replace('-', '_'), None)
+            try:
+                if not getattr(handler, 'is_campaign_action', False):
+                    raise BusinessLogicError(f"Unknown action '{action}'", {"campaign_id": str(campaign_id)})
+                results.append(await handler(
+                    db, campaign_id, user_id, **kwargs, _campaign=campaigns.get(campaign_id)
+                ))
+            except BusinessLogicError as e:
+                results.append(self._batch_item_error(campaign_id, e))
+        return results
+
+    async def generate_content_batch(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        items: List[Tuple[UUID, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Generates content for several (campaign_id, user_input) requests, e.g. a bulk approve.
+
+        Campaigns come from one IN (...) select, exactly as in
+        handle_campaign_actions_batch. Unlike that path, items run concurrently,
+        up to LLM_BATCH_CONCURRENCY LLM calls in flight. This is safe only because,
+        given `_campaign`, neither the guard nor generate_content touches `db`.
+
+        A campaign_id repeated in `items` runs only at its first position. Every
+        item is judged on the same pre-batch row, so each repeat would pass the
+        guard and pay for another LLM call; repeats fail with an error item instead.
+
+        A BusinessLogicError fails only its own item; results keep input order.
+        """
+        campaigns = await self._load_campaigns(db, {campaign_id for campaign_id, _ in items})
+        semaphore = asyncio.Semaphore(self.LLM_BATCH_CONCURRENCY)
+
+        async def run(campaign_id: UUID, user_input: Dict[str, Any], duplicate: bool) -> Dict[str, Any]:
+            if duplicate:
+                return self._batch_item_error(campaign_id, BusinessLogicError(
+                    "Duplicate campaign in batch", {"campaign_id": str(campaign_id)}
+                ))
+            async with semaphore:
+                try:
+                    return await self.generate_content(
+                        db, campaign_id, user_id, user_input, _campaign=campaigns.get(campaign_id)
+                    )
+                except BusinessLogicError as e:
+                    return self._batch_item_error(campaign_id, e)
+
+        seen = set()
+        calls = []
+        for campaign_id, user_input in items:
+            calls.append(run(campaign_id, user_input, duplicate=campaign_id in seen))
+            seen.add(campaign_id)
+        return list(await asyncio.gather(*calls))
+
+    async def _load_campaigns(self, db: AsyncSession, campaign_ids) -> Dict[UUID, Campaign]:
+        """
+        One guard-shaped select for every campaign in a batch, keyed by id.
+
+        Campaigns the session already holds are refreshed in place instead
+        (see _GUARD_REFRESH_ATTRS); a fresh batch session has none.
+        """
+        campaigns = {}
+        to_select = []
+        for campaign_id in campaign_ids:
+            held = _held_campaign(db, campaign_id)
+            if held is None:
+                to_select.append(campaign_id)
+            elif await _refresh_guard_columns(db, held) is not None:
+                campaigns[campaign_id] = held
+        if to_select:
+            result = await db.execute(
+                select(Campaign)
+                .options(*_GUARD_OPTIONS)
+                .where(Campaign.id.in_(to_select))
+            )
+            campaigns.update((campaign.id, campaign) for campaign in result.scalars().all())
+        return campaigns
+
+    @staticmethod
+    def _batch_item_error(campaign_id: UUID, error: BusinessLogicError) -> Dict[str, Any]:
+        return {
+            "campaign_id": str(campaign_id),
+            "error": error.message,
+            "details": error.details
+        }
     
     @require_valid_campaign(['ideas_approved'])
     async def generate_content(
@@ -116,33 +305,36 @@ class AIService:
         db: AsyncSession,
         campaign_id: UUID,
         user_id: UUID,
-        user_input: Dict[str, Any]
+        user_input: Dict[str, Any],
+        *,
+        campaign: Campaign
     ) -> Dict[str, Any]:
         """
         Orchestrates the AI generation process. 
         Note: The decorator guarantees we never pay for an AI call 
-        if the business logic state is invalid.
+        if the business logic state is invalid, and supplies the `campaign`
+        it already loaded.
         """
-        campaign = await db.get(Campaign, campaign_id)
-        
         # 1. Context Construction
-        prompt = f"Generate marketing content for campaign: {campaign.name}. Context: {user_input}"
+        prompt = self._construct_prompt(campaign, user_input)
         
-        # 2. Inference & Cleaning
+        # 2. Inference
         try:
             raw_response = await self._call_llm_provider(prompt)
-            parsed_content = self._robust_json_parse(raw_response)
-            validated_content = self._validate_content_schema(parsed_content)
-            
-            return {
-                "campaign_id": str(campaign_id),
-                "content": validated_content,
-                "status": "content_generated"
-            }
-            
         except Exception as e:
-            # Re-raise as business logic error for frontend handling
-            raise BusinessLogicError(f"AI Generation Failed: {str(e)}", {"input": user_input})
+            # Re-raise as business logic error for frontend handling; the original
+            # stays chained as __cause__ for logging
+            raise BusinessLogicError("AI Generation Failed", {"cause": repr(e), "input": user_input}) from e
+
+        # 3. Cleaning (both raise BusinessLogicError themselves)
+        parsed_content = self._robust_json_parse(raw_response)
+        validated_content = self._validate_content_schema(parsed_content)
+
+        return {
+            "campaign_id": str(campaign_id),
+            "content": validated_content,
+            "status": "content_generated"
+        }
 
     # --- OUTPUT GUARDRAIL ---
     def _robust_json_parse(self, raw_text: str) -> Dict:
@@ -151,35 +343,48 @@ class AIService:
         Solves: Markdown code blocks, trailing commas, and 'Gemini' wrappers.
         """
         stripped_text = raw_text.strip()
-        
-        # Strip Markdown (```json ... ```)
-        md_start = "```json"
-        md_end = "```"
-        
-        if md_start in stripped_text:
-            start_idx = stripped_text.find(md_start) + len(md_start)
-            end_idx = stripped_text.rfind(md_end)
-            if end_idx > start_idx:
-                stripped_text = stripped_text[start_idx:end_idx].strip()
-            else:
-                stripped_text = stripped_text[start_idx:].strip()
-        elif stripped_text.startswith("```"):
-            # Generic code block fallback
-            stripped_text = stripped_text.strip("`").strip()
 
-        # Parse with JSON5 (Lenient) vs JSON (Strict)
+        # Bare JSON (the common case with JSON response mode) skips fence handling
+        if not (stripped_text[:1] in ('{', '[') and stripped_text[-1:] in ('}', ']')):
+            # Strip Markdown (```json ... ``` or a bare ``` block), chatter included
+            # First fence (optionally tagged json) up to its closing fence, or to the
+            # end of the text if the model stopped before closing it
+            _, fence, rest = stripped_text.partition('```')
+            if fence:
+                if rest.startswith('json'):
+                    rest = rest[4:]
+                body, closing, _ = rest.partition('```')
+                stripped_text = (body if closing else rest).strip()
+
+        # Cheap shape check: refusals and chatter never reach a parser
+        if not stripped_text or stripped_text[0] not in '{[':
+            raise BusinessLogicError(
+                message="LLM Output Parsing Failed: response is not a JSON object or array",
+                details={"raw_snippet": raw_text[:100]}
+            )
+
+        # Strict JSON first (C parser, covers nearly every response);
+        # JSON5 (Lenient, pure Python) only for trailing commas, comments, etc.
+        try:
+            return json.loads(stripped_text)
+        except json.JSONDecodeError:
+            pass
+
         try:
             return json5.loads(stripped_text)
         except Exception as e:
             raise BusinessLogicError(
-                message=f"LLM Output Parsing Failed: {str(e)}", 
-                details={"raw_snippet": raw_text[:100]}
-            )
+                message="LLM Output Parsing Failed",
+                details={"cause": repr(e), "raw_snippet": raw_text[:100]}
+            ) from e
 
     def _validate_content_schema(self, data: Dict) -> Dict:
-        required = ["headline", "body"]
-        if not all(k in data for k in required):
-            raise BusinessLogicError("AI response missing required schema keys")
+        if not isinstance(data, dict):
+            # A top-level JSON array parses fine but can never carry the schema
+            raise BusinessLogicError("AI response is not a JSON object", {"type": type(data).__name__})
+        missing = _REQUIRED_CONTENT_KEYS - data.keys()
+        if missing:
+            raise BusinessLogicError("AI response missing required schema keys", {"missing": sorted(missing)})
         return data
 
     async def _call_llm_provider(self, prompt: str) -> str:
@@ -196,8 +401,10 @@ class AIService:
 
    
 
-    def _construct_prompt(self, campaign, user_input):
-        return f"Generate content for {campaign.name}..."
+    def _construct_prompt(self, campaign: Campaign, user_input: Dict[str, Any]) -> str:
+        """Single prompt builder; context is sent as compact JSON rather than a Python repr."""
+        context = json.dumps(user_input, separators=(',', ':'), default=str)
+        return f"Generate marketing content for campaign: {campaign.name}. Context: {context}"
 
 
 # ---
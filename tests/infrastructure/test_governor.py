@@ -10,10 +10,17 @@ Tests focus on:
 
 import pytest
 import asyncio
+import resource
+import signal
 import time
-from unittest.mock import AsyncMock, MagicMock, patch, call
+import asyncpg
+from types import SimpleNamespace
+from unittest.mock import ANY, DEFAULT, AsyncMock, MagicMock, patch
 
-from src.infrastructure.gcp_postgres_governor import PostgresGovernor
+from src.infrastructure.gcp_postgres_governor import (
+    AsyncBatchLogger, PostgresGovernor, TerminatedConnection, TerminationEvent,
+    _ACTION_TIMEOUT_SEC, _prepare_action_statements
+)
 
 @pytest.fixture
 def mock_logger():
@@ -48,7 +55,6 @@ def mock_db_components():
 
 # --- TESTS ---
 
-@pytest.mark.asyncio
 async def test_graduated_response_warning_level(governor, mock_logger):
     metrics = {
         'conn_usage': 0.71,
@@ -59,7 +65,24 @@ async def test_graduated_response_warning_level(governor, mock_logger):
     await governor._evaluate_and_act(metrics)
     assert any(c[0][0]['event'] == 'connection_saturation_warning' for c in mock_logger.log_struct.call_args_list)
 
-@pytest.mark.asyncio
+async def test_instance_metrics_warn_without_intervening(governor, mock_logger):
+    """Test that Cloud Monitoring CPU and memory above their warnings are logged, never acted on."""
+    metrics = {
+        'conn_usage': 0.10,
+        'max_duration': 0,
+        'cpu_utilization': 0.50,
+        'memory_utilization': 0.93
+    }
+    governor._shed_load = AsyncMock()
+    governor._optimize_pool = AsyncMock()
+    await governor._evaluate_and_act(metrics)
+
+    events = [c[0][0]['event'] for c in mock_logger.log_struct.call_args_list]
+    assert events == ['memory_utilization_warning']
+    assert mock_logger.log_struct.call_args[0][0]['usage'] == '93.0%'
+    governor._shed_load.assert_not_called()
+    governor._optimize_pool.assert_not_called()
+
 async def test_graduated_response_intervention_level(governor):
     metrics = {
         'conn_usage': 0.87,
@@ -71,7 +94,6 @@ async def test_graduated_response_intervention_level(governor):
     await governor._evaluate_and_act(metrics)
     governor._optimize_pool.assert_called_once()
 
-@pytest.mark.asyncio
 async def test_graduated_response_critical_level(governor):
     metrics = {
         'conn_usage': 0.96,
@@ -83,92 +105,563 @@ async def test_graduated_response_critical_level(governor):
     await governor._evaluate_and_act(metrics)
     governor._shed_load.assert_called_once_with(metrics, mode='CRITICAL')
 
-@pytest.mark.asyncio
 async def test_priority_based_termination_logic(governor, mock_logger, mock_db_components):
     """
     Uses mock_db_components to  handle async context manager.
     """
     mock_pool, mock_conn = mock_db_components
     
-    # Mock return: 2 idle connections
-    mock_conn.fetch.return_value = [
-        {'pid': 101, 'state': 'idle', 'duration': 600, 'query': 'SELECT 1', 'username': 'app', 'application_name': 'web'},
-        {'pid': 102, 'state': 'idle', 'duration': 500, 'query': 'SELECT 2', 'username': 'app', 'application_name': 'web'}
+    # Mock return: 2 idle connections, terminated by the ranking statement itself
+    mock_conn.shed_load_safe.fetch.return_value = [
+        # Positional, like asyncpg Records: pid, state, duration, application_name, query_id, terminated
+        (101, 'idle', 600, 'web', None, True),
+        (102, 'idle', 500, 'web', None, True)
     ]
     
-    governor.db_pool = mock_pool
+    governor._action_pool = mock_pool
     
     metrics = {'total_count': 19, 'max_connections': 20}
     
     await governor._shed_load(metrics, mode='INTERVENTION')
     
-    # Now this will pass because the code actually executed
-    assert mock_conn.execute.call_count == 2
+    # Ranking and termination happen in a single round trip on the prepared statement
+    mock_conn.shed_load_safe.fetch.assert_called_once_with(
+        2, [], *governor._governor_filter, timeout=_ACTION_TIMEOUT_SEC
+    )
+    mock_conn.shed_load_critical.fetch.assert_not_called()
+    mock_conn.execute.assert_not_called()
+
+    shed_log = next(c[0][0] for c in mock_logger.log_struct.call_args_list
+                    if c[0][0]['event'] == 'load_shedding_executed')
+    assert shed_log['connections_terminated'] == 2
+    assert [d['pid'] for d in shed_log['details']] == [101, 102]
+    assert shed_log['details_truncated'] == 0
+
+async def test_recently_signalled_pids_are_excluded_until_ttl(governor, mock_db_components):
+    """Test that backends still exiting after a signal are not re-ranked on the next tick."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.shed_load_safe.fetch.return_value = [
+        (101, 'idle', 600, 'web', None, True),
+        (102, 'idle', 500, 'web', None, False)  # Signal not delivered
+    ]
+    governor._action_pool = mock_pool
+    metrics = {'total_count': 19, 'max_connections': 20}
+
+    await governor._shed_load(metrics, mode='INTERVENTION')
+    await governor._shed_load(metrics, mode='INTERVENTION')
+    assert mock_conn.shed_load_safe.fetch.call_args[0][1] == [101]
+
+    governor._recent_kills[101] = time.monotonic() - 1  # Grace window elapsed
+    await governor._shed_load(metrics, mode='INTERVENTION')
+    assert mock_conn.shed_load_safe.fetch.call_args[0][1] == []
+
+async def test_action_statements_prepared_on_connect():
+    """Test that both shed-load variants are prepared once per action connection."""
+    conn = SimpleNamespace(  # Only attributes it sets exist
+        prepare=AsyncMock(side_effect=lambda sql: sql),
+        get_server_version=lambda: SimpleNamespace(major=16)
+    )
+
+    await _prepare_action_statements(conn)
+
+    assert conn.prepare.call_count == 2
+    assert 'query_id AS query_id' in conn.shed_load_safe
+    assert 'backend_xid IS NULL' in conn.shed_load_safe
+    assert 'backend_xid IS NULL' not in conn.shed_load_critical
+    assert 'pg_terminate_backend' in conn.shed_load_critical
+    assert 'CASE' not in conn.shed_load_critical  # Priorities come from the VALUES map
+    assert 'query,' not in conn.shed_load_safe  # Query text is never shipped for shedding
+
+async def test_action_statements_prepare_without_query_id_before_pg14():
+    """Test that PostgreSQL 13 gets a NULL query_id instead of a pool that fails to create."""
+    conn = SimpleNamespace(
+        prepare=AsyncMock(side_effect=lambda sql: sql),
+        get_server_version=lambda: SimpleNamespace(major=13)
+    )
+
+    await _prepare_action_statements(conn)
+
+    for sql in (conn.shed_load_critical, conn.shed_load_safe):
+        assert 'NULL::bigint AS query_id' in sql
+        assert 'query_id AS query_id' not in sql
 
-@pytest.mark.asyncio
 async def test_circuit_breaker_triggers_after_three_failures(governor):
-    """Test that circuit breaker engages after 3 failed interventions."""
-    governor._intervention_attempts = 3
-    
-    governor._last_intervention_time = time.time() 
+    """Test that circuit breaker engages after 3 consecutive failed interventions."""
+    for _ in range(3):
+        governor._record_intervention_attempt(success=False)
     
     assert governor._should_trigger_circuit_breaker() is True
 
-@pytest.mark.asyncio
+async def test_circuit_breaker_success_clears_failure_streak(governor):
+    """Test that a successful intervention resets the count towards tripping."""
+    governor._record_intervention_attempt(success=False)
+    governor._record_intervention_attempt(success=False)
+    governor._record_intervention_attempt(success=True)
+    governor._record_intervention_attempt(success=False)
+    
+    assert governor._should_trigger_circuit_breaker() is False
+
 async def test_circuit_breaker_resets_after_timeout(governor):
-    """Test that circuit breaker resets after 5 minutes of stability."""
-    governor._intervention_attempts = 3
-    governor._last_intervention_time = time.time() - 360 # 6 mins ago
+    """Test that after 5 minutes OPEN one probe runs, and its success closes the breaker."""
+    for _ in range(3):
+        governor._record_intervention_attempt(success=False)
+    governor._intervention_breaker.opened_at = time.monotonic() - 360 # 6 mins ago
     
     assert governor._should_trigger_circuit_breaker() is False
+    assert governor._intervention_breaker.state == 'HALF_OPEN'
     
-    safe_metrics = {'conn_usage': 0.5, 'max_duration': 5} 
-    await governor._evaluate_and_act(safe_metrics)
+    governor._record_intervention_attempt(success=True)
+    assert governor._intervention_breaker.state == 'CLOSED'
+    assert governor._intervention_breaker.failures == 0
+
+async def test_failed_probe_reopens_and_gates_interventions(governor, mock_db_components):
+    """Test that a failed HALF_OPEN probe re-opens the breaker and interventions skip the DB."""
+    mock_pool, mock_conn = mock_db_components
+    governor._action_pool = mock_pool
+    for _ in range(3):
+        governor._record_intervention_attempt(success=False)
+    governor._intervention_breaker.opened_at = time.monotonic() - 360
+    
+    assert governor._should_trigger_circuit_breaker() is False
+    governor._record_intervention_attempt(success=False)
     
-    assert governor._intervention_attempts == 0
+    await governor._optimize_pool({})
+    await governor._terminate_long_running_queries({})
+    mock_pool.acquire.assert_not_called()
+
+async def test_retry_guard_suppresses_interventions_on_high_rejection_rate(governor, mock_logger):
+    """Test that flapping outcomes (never 3 in a row) still stop interventions for the cooldown."""
+    governor._shed_load = AsyncMock()
+    for success in (False, True, False, True, False):
+        governor._record_intervention_attempt(success=success)
+    assert governor._should_trigger_circuit_breaker() is False
+
+    critical_metrics = {'conn_usage': 0.99, 'max_duration': 5}
+    await governor._evaluate_and_act(critical_metrics)
+
+    governor._shed_load.assert_not_called()
+    assert any(c[0][0]['event'] == 'interventions_suppressed' for c in mock_logger.log_struct.call_args_list)
+
+    governor._no_intervene_until = time.monotonic() - 1  # Cooldown over: probe allowed
+    await governor._evaluate_and_act(critical_metrics)
+    governor._shed_load.assert_called_once_with(critical_metrics, mode='CRITICAL')
+
+async def test_telemetry_single_aggregate_row(governor, mock_db_components):
+    """Test that one aggregate row becomes the metrics dict, without reading query text."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.fetchrow.return_value = {
+        'active_count': 4, 'idle_count': 10, 'idle_in_tx_count': 1, 'total_count': 15,
+        'max_query_duration': None, 'max_tx_duration': 12.5, 'max_connections': 20
+    }
+    governor._telemetry_pool = mock_pool
+
+    metrics = await governor._gather_telemetry()
+
+    assert metrics['conn_usage'] == 0.75
+    assert metrics['max_duration'] == 0  # No active query
+    assert metrics['max_tx_duration'] == 12.5
+    sql, roles, pattern = mock_conn.fetchrow.call_args[0]
+    assert 'temp_bytes' not in sql and ' query,' not in sql
+    # Own pools not counted; role and name are both required, and both are bound
+    assert 'NOT (usename = ANY($1::text[]) AND application_name LIKE $2)' in sql
+    assert (roles, pattern) == governor._governor_filter
+
+async def test_create_db_pools_resolves_governor_roles(governor, mock_db_components):
+    """Test that the excluded roles come from the server, since pool users may fall back to DATABASE_URL."""
+    telemetry_pool, (action_pool, action_conn) = MagicMock(), mock_db_components
+    telemetry_pool.fetchval = AsyncMock(return_value='governor_telemetry')
+    action_pool.fetchval = AsyncMock(return_value='governor_action')
+    action_conn.get_server_version = lambda: SimpleNamespace(major=13)
+
+    with patch('asyncpg.create_pool', AsyncMock(side_effect=[telemetry_pool, action_pool])):
+        await governor._create_db_pools()
+
+    assert governor._governor_filter == (['governor_action', 'governor_telemetry'], 'postgres-governor%')
+    # Matched to the server: no pg_stat_activity.query_id before PostgreSQL 14
+    assert 'NULL::bigint AS query_id' in governor._long_query_sql
 
-@pytest.mark.asyncio
 async def test_telemetry_gathering_handles_errors_gracefully(governor, mock_logger, mock_db_components):
     """Test that telemetry gathering doesn't crash on database errors."""
 
     mock_pool, mock_conn = mock_db_components
     
     mock_conn.fetchrow.side_effect = Exception("Connection timeout")
-    governor.db_pool = mock_pool
+    governor._telemetry_pool = mock_pool
     
     result = await governor._gather_telemetry()
     
     assert result == {}
-    assert any('telemetry_gathering_failed' in str(c) for c in mock_logger.log_struct.call_args_list)
+    assert any(c[0][0]['event'] == 'telemetry_gathering_failed' for c in mock_logger.log_struct.call_args_list)
+
+async def test_db_breaker_fast_fails_after_consecutive_failures(governor, mock_logger, mock_db_components):
+    """Test that repeated telemetry failures open the DB breaker and skip the round trip."""
+
+    mock_pool, mock_conn = mock_db_components
+
+    mock_conn.fetchrow.side_effect = Exception("Connection timeout")
+    governor._telemetry_pool = mock_pool
+
+    for _ in range(3):
+        await governor._gather_telemetry()
+
+    assert governor._db_breaker.state == 'OPEN'
+    mock_pool.acquire.reset_mock()
+
+    assert await governor._gather_telemetry() == {}
+    mock_pool.acquire.assert_not_called()
+    assert any(c[0][0]['event'] == 'circuit_open' for c in mock_logger.log_struct.call_args_list)
+
+async def test_db_breaker_closes_after_successful_probes(governor):
+    """Test OPEN → HALF_OPEN after cooldown, then CLOSED after 3 successful probes."""
+    breaker = governor._db_breaker
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at = time.monotonic() - 61  # Cooldown elapsed
+
+    assert breaker.allow() is True
+    assert breaker.state == 'HALF_OPEN'
+
+    for _ in range(3):
+        breaker.record_success()
+    assert breaker.state == 'CLOSED'
+
+async def test_breakers_time_cooldowns_on_governor_clock(mock_logger):
+    """Test that both breakers open and cool down on the governor's injected clock."""
+    now = [1000.0]
+    with patch('resource.setrlimit'), patch('time.monotonic', lambda: now[0]):
+        governor = PostgresGovernor()
+    breaker = governor._db_breaker
+    assert governor._intervention_breaker.clock is governor._clock is breaker.clock
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.opened_at == 1000.0
+    assert breaker.allow() is False
+
+    now[0] += 61  # Past the 60s cooldown on the injected clock only
+    assert breaker.allow() is True
+    assert breaker.state == 'HALF_OPEN'
+
+async def test_instance_metrics_parsed_from_cloud_monitoring(governor):
+    """Test that the newest point of each Cloud SQL series lands in the metrics dict."""
+
+    def series(metric_type, *values):
+        return SimpleNamespace(
+            metric=SimpleNamespace(type=metric_type),
+            points=[SimpleNamespace(value=SimpleNamespace(double_value=v)) for v in values]
+        )
+
+    async def pager():
+        yield series('cloudsql.googleapis.com/database/cpu/utilization', 0.91, 0.40)
+        yield series('cloudsql.googleapis.com/database/memory/utilization', 0.55)
+
+    governor._monitoring_client = MagicMock()
+    governor._monitoring_client.list_time_series = AsyncMock(return_value=pager())
+
+    with patch.dict('src.infrastructure.gcp_postgres_governor.CLOUD_MONITORING_CONFIG',
+                    project_id='proj', database_id='db'):
+        result = await governor._gather_instance_metrics()
+
+    assert result == {'cpu_utilization': 0.91, 'memory_utilization': 0.55}
+    governor._monitoring_client.list_time_series.assert_called_once()
+    call_kwargs = governor._monitoring_client.list_time_series.call_args.kwargs
+    assert call_kwargs['retry'] is None
+    assert call_kwargs['timeout'] == governor.INSTANCE_METRICS_TIMEOUT_SEC
+
+async def test_instance_metrics_give_up_on_hung_api(governor, mock_logger):
+    """Test that a hung Monitoring API costs at most the budget and yields no metrics."""
+    async def hang(**kwargs):
+        await asyncio.Event().wait()
+
+    governor._monitoring_client = MagicMock()
+    governor._monitoring_client.list_time_series = hang
+    governor.INSTANCE_METRICS_TIMEOUT_SEC = 0.01
+
+    with patch.dict('src.infrastructure.gcp_postgres_governor.CLOUD_MONITORING_CONFIG',
+                    project_id='proj', database_id='db'):
+        result = await asyncio.wait_for(governor._gather_instance_metrics(), timeout=1)
+
+    assert result == {}
+    assert mock_logger.log_struct.call_args[0][0] == {'event': 'instance_metrics_timeout', 'timeout_sec': 0.01}
 
-@pytest.mark.asyncio
-async def test_long_running_query_termination(governor, mock_db_components):
+async def test_instance_metrics_skipped_when_not_configured(governor):
+    """Without GCP_PROJECT_ID/DATABASE_ID no client exists and nothing is fetched."""
+    assert await governor._gather_instance_metrics() == {}
+
+async def test_pool_optimization_logs_idle_terminations(governor, mock_logger, mock_db_components):
+    """Test that idle cleanup counts delivered signals and logs one entry per backend."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.fetch.return_value = [(301, 'web', True), (302, 'worker', False)]
+    governor._action_pool = mock_pool
+
+    await governor._optimize_pool({})
+
+    logged = mock_logger.log_struct.call_args[0][0]
+    assert logged['event'] == 'pool_optimization'
+    assert logged['idle_connections_terminated'] == 1
+    assert logged['details'] == [
+        {'pid': 301, 'app': 'web', 'terminated': True},
+        {'pid': 302, 'app': 'worker', 'terminated': False}
+    ]
+
+async def test_long_running_query_termination(governor, mock_logger, mock_db_components):
     """Test that queries exceeding critical duration are terminated."""
     
     mock_pool, mock_conn = mock_db_components
     
     mock_conn.fetch.return_value = [
-        {'pid': 201, 'query': 'SELECT slow', 'duration': 50}
+        (201, 'SELECT slow', 42, 50, True)  # pid, query, query_id, duration, terminated
     ]
+    governor._top_queries = {42: (900, 123456.0)}
     
-    governor.db_pool = mock_pool
+    governor._action_pool = mock_pool
     metrics = {'max_duration': 50}
     
     await governor._terminate_long_running_queries(metrics)
     
-    mock_conn.execute.assert_called_once()
+    # Selection and termination share one statement; no per-PID round trip
+    mock_conn.fetch.assert_called_once()
+    sql, limit, threshold, *governor_filter = mock_conn.fetch.call_args[0]
+    assert 'pg_terminate_backend' in sql
+    assert '%s' not in sql and threshold == governor._query_critical  # Bound, not formatted
+    assert 'LEFT(query, 500)' in sql  # Truncated before it leaves the server
+    assert limit == governor.LONG_QUERY_KILL_LIMIT
+    assert tuple(governor_filter) == governor._governor_filter
+    mock_conn.execute.assert_not_called()
+
+    # Annotated with the statement's cumulative cost from the last sample
+    logged = mock_logger.log_struct.call_args[0][0]
+    assert logged['event'] == 'long_query_terminated'
+    assert logged['query_id'] == 42 and logged['query_total_exec_ms'] == 123456.0
+
+async def test_top_statements_sampled_every_tenth_tick(governor, mock_db_components):
+    """Test that pg_stat_statements is read on the first tick and then every 10th."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.fetch.return_value = [(42, 900, 123456.0)]
+    governor._telemetry_pool = mock_pool
+
+    ticks = 0
+    async def gather_telemetry():
+        nonlocal ticks
+        ticks += 1
+        if ticks == governor.STATEMENT_SAMPLE_EVERY_TICKS + 1:
+            governor._shutdown_event.set()
+        return {'conn_usage': 0.1}
+
+    with patch.multiple(governor, _gather_telemetry=gather_telemetry,
+                        _gather_instance_metrics=AsyncMock(return_value={}),
+                        _evaluate_and_act=AsyncMock(), _wait_for_shutdown=AsyncMock()):
+        await governor._monitoring_loop()
+
+    assert mock_conn.fetch.call_count == 2
+    assert mock_conn.fetch.call_args[0][1] == governor.TOP_STATEMENTS_LIMIT
+    assert governor._top_queries == {42: (900, 123456.0)}
+
+async def test_top_statements_sampled_next_tick_when_first_tick_fails(governor, mock_db_components):
+    """Test that a failed first telemetry read does not push the first sample out by 10 ticks."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.fetch.return_value = [(42, 900, 123456.0)]
+    governor._telemetry_pool = mock_pool
+
+    ticks = 0
+    async def gather_telemetry():
+        nonlocal ticks
+        ticks += 1
+        if ticks == 3:
+            governor._shutdown_event.set()
+        return {} if ticks == 1 else {'conn_usage': 0.1}
+
+    with patch.multiple(governor, _gather_telemetry=gather_telemetry,
+                        _gather_instance_metrics=AsyncMock(return_value={}),
+                        _evaluate_and_act=AsyncMock(), _wait_for_shutdown=AsyncMock()):
+        await governor._monitoring_loop()
+
+    assert mock_conn.fetch.call_count == 1  # Tick 1 samples; tick 2 already has one
+    assert governor._top_queries == {42: (900, 123456.0)}
+
+async def test_top_statements_disabled_without_extension(governor, mock_logger, mock_db_components):
+    """Test that a missing pg_stat_statements switches sampling off instead of retrying."""
+    mock_pool, mock_conn = mock_db_components
+    mock_conn.fetch.side_effect = asyncpg.UndefinedTableError('relation "pg_stat_statements" does not exist')
+    governor._telemetry_pool = mock_pool
+
+    await governor._sample_top_statements()
+    await governor._sample_top_statements()
+
+    assert governor._top_queries is None
+    assert mock_conn.fetch.call_count == 1
+    assert governor._db_breaker.state == 'CLOSED'  # Not a connectivity failure
+    assert any(c[0][0]['event'] == 'statement_sampling_disabled' for c in mock_logger.log_struct.call_args_list)
+
 
+async def test_batch_logger_commits_queued_entries_in_one_batch():
+    """Test that entries logged while running are committed as a single batch, not per call."""
+    gcp_logger = MagicMock()
+    pending = gcp_logger.batch.return_value.__enter__.return_value
+
+    batch_logger = AsyncBatchLogger(gcp_logger)
+    batch_logger.start()
+    batch_logger.log_struct({'event': 'a'}, severity='INFO')
+    batch_logger.log_struct({'event': 'b'}, severity='WARNING')
+    batch_logger.log_text('c', severity='INFO')
+    await batch_logger.stop()
+
+    gcp_logger.batch.assert_called_once()
+    assert pending.log_struct.call_count == 2
+    pending.log_text.assert_called_once_with('c', severity='INFO', timestamp=ANY)
+    gcp_logger.log_struct.assert_not_called()
+
+async def test_batch_logger_drops_oldest_entries_when_full():
+    """Test that a full queue evicts the oldest entry and reports the drop."""
+    gcp_logger = MagicMock()
+    pending = gcp_logger.batch.return_value.__enter__.return_value
+
+    batch_logger = AsyncBatchLogger(gcp_logger, maxsize=2)
+    batch_logger.start()  # Consumer has not run yet, so the queue fills up
+    for event in ('a', 'b', 'c'):
+        batch_logger.log_struct({'event': event}, severity='INFO')
+    await batch_logger.stop()
+
+    committed = [c[0][0]['event'] for c in pending.log_struct.call_args_list]
+    assert committed == ['b', 'c', 'log_entries_dropped']
+
+async def test_batch_logger_takes_drop_count_on_loop_thread():
+    """Test that the drop count is taken before the executor runs, so drops during a commit carry over."""
+    gcp_logger = MagicMock()
+    pending = gcp_logger.batch.return_value.__enter__.return_value
+    batch_logger = AsyncBatchLogger(gcp_logger)
+    batch_logger._dropped = 3
+
+    commit = batch_logger._submit(asyncio.get_running_loop(), [('struct', {'event': 'a'}, 'INFO', time.time())])
+    assert batch_logger._dropped == 0
+    batch_logger._dropped += 1  # Dropped while the commit is in flight
+    await commit
+
+    assert pending.log_struct.call_args[0][0] == {'event': 'log_entries_dropped', 'count': 3}
+    assert batch_logger._dropped == 1  # Reported with the next batch, not lost
+
+async def test_batch_logger_retries_singly_when_batch_commit_fails():
+    """Test that one unwritable entry costs only itself, not the rest of its batch."""
+    gcp_logger = MagicMock()
+    gcp_logger.batch.return_value.__exit__.side_effect = TypeError('Decimal is not JSON serializable')
+    gcp_logger.log_struct.side_effect = [TypeError('Decimal is not JSON serializable'), None]
+
+    batch_logger = AsyncBatchLogger(gcp_logger)
+    batch_logger.start()
+    batch_logger.log_struct({'event': 'bad'}, severity='WARNING')
+    batch_logger.log_struct({'event': 'good'}, severity='INFO')
+    batch_logger.log_text('plain', severity='INFO')
+    await batch_logger.stop()
+
+    assert [c[0][0]['event'] for c in gcp_logger.log_struct.call_args_list] == ['bad', 'good']
+    gcp_logger.log_struct.assert_called_with({'event': 'good'}, severity='INFO', timestamp=ANY)
+    gcp_logger.log_text.assert_called_once_with('plain', severity='INFO', timestamp=ANY)
+
+async def test_batch_logger_converts_dataclass_events_at_commit():
+    """Test that structured events are queued as objects and committed as plain dicts."""
+    gcp_logger = MagicMock()
+    pending = gcp_logger.batch.return_value.__enter__.return_value
+    event = TerminationEvent(
+        event='load_shedding_executed', mode='CRITICAL', connections_terminated=1,
+        signal_failures=0, execution_time_ms=1.0, remaining_capacity=5,
+        details=(TerminatedConnection(pid=101, state='idle', duration_sec=600.0, app='web', terminated=True,
+                                     query_id=None, query_total_exec_ms=None),),
+        details_truncated=0
+    )
+
+    batch_logger = AsyncBatchLogger(gcp_logger)
+    batch_logger.start()
+    batch_logger.log_struct(event, severity='WARNING')
+    await batch_logger.stop()
+
+    payload = pending.log_struct.call_args[0][0]
+    assert payload['event'] == 'load_shedding_executed'
+    assert payload['details'][0] == {'pid': 101, 'state': 'idle', 'duration_sec': 600.0, 'app': 'web', 'terminated': True,
+                                     'query_id': None, 'query_total_exec_ms': None}
+
+
+async def test_batch_logger_flush_commits_without_waiting_for_interval():
+    """Test that flush() commits a partial batch before FLUSH_INTERVAL_SEC elapses."""
+    gcp_logger = MagicMock()
+    batch_logger = AsyncBatchLogger(gcp_logger)
+    batch_logger.start()
+    batch_logger.log_struct({'event': 'a'}, severity='INFO')
+    batch_logger.flush()
+
+    for _ in range(100):
+        if gcp_logger.batch.called:
+            break
+        await asyncio.sleep(0.01)
+
+    gcp_logger.batch.assert_called_once()
+    await batch_logger.stop()
+
+async def test_shutdown_signal_wakes_monitoring_loop(governor):
+    """Test that a shutdown request ends the loop mid-sleep instead of after the 30s tick."""
+    governor._loop = asyncio.get_running_loop()
+    governor._gather_telemetry = AsyncMock(return_value={})
+    governor._gather_instance_metrics = AsyncMock(return_value={})
+    governor._evaluate_and_act = AsyncMock()
+
+    loop_task = asyncio.create_task(governor._monitoring_loop())
+    await asyncio.sleep(0.01)  # Let the first tick run and start waiting
+    governor._handle_shutdown(signal.SIGTERM, None)
+
+    await asyncio.wait_for(loop_task, timeout=1)
+    governor._evaluate_and_act.assert_awaited_once()
+
+
+async def test_monitoring_loop_subtracts_tick_time_from_sleep(governor):
+    """Test that the wait after a tick is the interval minus the time the tick took."""
+    clock = iter([100.0, 104.0, 104.0])  # Tick start, slow-tick check, sleep computation
+    governor._clock = lambda: next(clock)
+    governor._gather_telemetry = AsyncMock(return_value={})
+    governor._gather_instance_metrics = AsyncMock(return_value={})
+    governor._evaluate_and_act = AsyncMock()
+
+    async def request_shutdown(timeout):
+        governor._shutdown_event.set()
+        governor.last_wait = timeout
+    governor._wait_for_shutdown = request_shutdown
+
+    await governor._monitoring_loop()
+    assert governor.last_wait == governor.MONITORING_INTERVAL_SEC - 4.0
+
+async def test_stop_closes_shared_clients(governor, mock_db_components):
+    """Test that shutdown releases the pools and the shared Monitoring channel."""
+    mock_pool, _ = mock_db_components
+    mock_pool.close = AsyncMock()
+    governor._telemetry_pool = mock_pool
+    governor._monitoring_client = MagicMock()
+    governor._monitoring_client.transport.close = AsyncMock()
+    client = governor._monitoring_client
+
+    await governor.stop()
+
+    mock_pool.close.assert_awaited_once()
+    client.transport.close.assert_awaited_once()
+    assert governor._monitoring_client is None
 
 def test_resource_limits_are_configured(governor, mock_logger):
-    """Test that memory limits are set during initialization."""
-    with patch('src.infrastructure.gcp_postgres_governor.resource.setrlimit') as mock_setrlimit:
+    """Test that memory, descriptor and process limits are set during initialization."""
+    unlimited = (resource.RLIM_INFINITY, resource.RLIM_INFINITY)
+    with patch.multiple(resource, getrlimit=MagicMock(return_value=unlimited), setrlimit=DEFAULT) as mocks:
         gov = PostgresGovernor()
         
+        limits = {args[0]: args[1] for args, _ in mocks['setrlimit'].call_args_list}
         # Should set RLIMIT_AS to 512MB
-        mock_setrlimit.assert_called_once()
-        args = mock_setrlimit.call_args[0]
-        assert args[1] == (512 * 1024 * 1024, -1)
+        assert limits[resource.RLIMIT_AS] == (512 * 1024 * 1024, -1)
+        assert limits[resource.RLIMIT_NOFILE] == (1024, 4096)
+        assert limits[resource.RLIMIT_NPROC] == (64, 128)
 
+def test_resource_limits_stay_within_current_hard_limit(governor, mock_logger):
+    """Test that a lower existing hard limit is kept rather than failing to raise it."""
+    with patch.multiple(resource, getrlimit=MagicMock(return_value=(256, 512)), setrlimit=DEFAULT) as mocks:
+        gov = PostgresGovernor()
+        
+        limits = {args[0]: args[1] for args, _ in mocks['setrlimit'].call_args_list}
+        assert limits[resource.RLIMIT_NOFILE] == (512, 512)
+        assert limits[resource.RLIMIT_AS] == (512, 512)
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])